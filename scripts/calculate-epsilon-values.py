@@ -28,36 +28,96 @@
 # calculate-epsilon-values.py
 # reads all meshes in a directory and outputs to a file the epsilon values
 # at which vertex clustering on those meshes removes 0.1%, 1%, 10%, and 50%
-# of vertices, respectively.
+# of vertices, respectively. meshes already listed in the output file are
+# skipped, so an interrupted run can be resumed by running it again.
 
 import os, argparse, pathlib, csv, subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+def find_epsilon(epsilon_finder_executable, file_path, eps, num_threads):
+    # the epsilon is the last token the finder prints, so only the last non-empty line is kept
+    last_line = ""
+    with subprocess.Popen([epsilon_finder_executable, file_path, eps, num_threads], stdout=subprocess.PIPE, encoding='utf-8') as process:
+        for line in process.stdout:
+            if not line.isspace():
+                last_line = line
+    # a finder that crashed may still have printed something that looks like an epsilon
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, process.args)
+    return last_line.split()[-1]
 
 def calculate_epsilons():
     my_parser = argparse.ArgumentParser(description="Takes all .PLY mesh files and computes epsilon values for 0.1%, 1%, 10%, and 50% reductions.")
     my_parser.add_argument('input_dir', metavar='input_directory', type=pathlib.Path, help='the directory containing the mesh files')
     my_parser.add_argument('dest_file', metavar='output_file', type=pathlib.Path, help='the .csv file in which to save the discovered epsilon values')
     my_parser.add_argument('epsilon_finder_app', metavar='eps_finder', type=pathlib.Path, help='The path to executable that discovers epsilon values')
-    input_directory = my_parser.parse_args().input_dir
-    output_file = my_parser.parse_args().dest_file
-    epsilon_finder_executable = my_parser.parse_args().epsilon_finder_app
+    args = my_parser.parse_args()
+    input_directory = os.fspath(args.input_dir)
+    output_file = args.dest_file
+    # pass plain strings to subprocess so each run doesn't convert the paths again
+    epsilon_finder_executable = os.fspath(args.epsilon_finder_app)
     num_threads = '2'
+    # each epsilon-finder run already uses num_threads cores, so only launch as many runs as fit on the machine
+    max_workers = max(1, (os.cpu_count() or 1) // int(num_threads))
+
+    # meshes already in the output file were finished by an earlier run, so only the rest are computed
+    finished_files = set()
+    if output_file.is_file():
+        with open(output_file, "rt", newline="") as fp:
+            finished_files = {row[0] for row in csv.reader(fp) if row}
 
-    all_files = [file.name for file in os.scandir(input_directory) if file.is_file() and pathlib.Path(file).suffix == ".ply"]
+    with os.scandir(input_directory) as entries:
+        all_files = [entry.name for entry in entries
+                     if entry.name.endswith(".ply") and entry.is_file() and entry.name not in finished_files]
     reduction_rates = ['0.1', '1.0', '10.0', '50.0']
-    all_epsilons = list()
+    epsilon_values = dict()
+    remaining_runs = [len(reduction_rates)] * len(all_files)
+    failed_files = dict()
+    next_row = 0
 
-    for sequence_num, filename in enumerate(all_files):
-        print("Discovering epsilon values for mesh #" + str(sequence_num) + " of " + str(len(all_files)) + ": " + filename)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, open(output_file, "at", newline="") as fp:
+        writer = csv.writer(fp, delimiter=",")
         try:
-            file_path = os.path.join(input_directory, filename)
-            epsilon_values = [subprocess.run([epsilon_finder_executable, file_path, eps, num_threads], stdout=subprocess.PIPE).stdout.decode('utf-8').split()[-1] for eps in reduction_rates]
-            all_epsilons.append([filename] + epsilon_values)
-        except:
-            pass
+            futures = dict()
+            for sequence_num, filename in enumerate(all_files):
+                file_path = os.path.join(input_directory, filename)
+                for rate_num, eps in enumerate(reduction_rates):
+                    future = executor.submit(find_epsilon, epsilon_finder_executable, file_path, eps, num_threads)
+                    futures[future] = (sequence_num, rate_num)
 
-    with open(output_file, "wt") as fp:
-        writer = csv.writer(fp, delimiter=",")
-        writer.writerows(all_epsilons)
+            for future in as_completed(futures):
+                sequence_num, rate_num = futures[future]
+                remaining_runs[sequence_num] -= 1
+                try:
+                    epsilon_values.setdefault(sequence_num, [None] * len(reduction_rates))[rate_num] = future.result()
+                except (OSError, subprocess.SubprocessError, IndexError, UnicodeDecodeError) as e:
+                    # OSError: the finder could not be launched, SubprocessError: it exited with an error,
+                    # IndexError: it printed nothing
+                    failed_files.setdefault(sequence_num, repr(e))
+                if remaining_runs[sequence_num] == 0 and sequence_num not in failed_files:
+                    print("Discovered epsilon values for mesh #" + str(sequence_num) + " of " + str(len(all_files)) + ": " + all_files[sequence_num])
+
+                # write every finished mesh at the head of the queue, so rows keep the input order
+                while next_row < len(all_files) and remaining_runs[next_row] == 0:
+                    values = epsilon_values.pop(next_row, None)
+                    if next_row not in failed_files:
+                        writer.writerow([all_files[next_row]] + values)
+                        fp.flush()
+                    next_row += 1
+        except BaseException:
+            # on Ctrl-C or an unexpected error, drop the queued runs instead of starting a finder for each of them
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    # record the meshes that failed next to the output file; they are retried on the next run
+    failed_file = output_file.with_name(output_file.name + ".failed")
+    if failed_files:
+        print(str(len(failed_files)) + " of " + str(len(all_files)) + " meshes failed, see " + str(failed_file))
+        with open(failed_file, "wt", newline="") as fp:
+            writer = csv.writer(fp, delimiter=",")
+            writer.writerows([all_files[sequence_num], error] for sequence_num, error in sorted(failed_files.items()))
+    elif failed_file.is_file():
+        failed_file.unlink()
 
 if __name__ == "__main__":
     calculate_epsilons()
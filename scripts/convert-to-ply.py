@@ -29,29 +29,41 @@
 # mostly designed to convert the .STL Thingi10k files to .PLY
 
 import os, argparse, pathlib, meshio
+from concurrent.futures import ProcessPoolExecutor
+
+def convert_mesh(task):
+    input_directory, output_directory, filename = task
+    try:
+        mesh = meshio.read(os.path.join(input_directory, filename))
+        output_path = os.path.splitext(filename)[0] + ".ply"
+        mesh.write(os.path.join(output_directory, output_path))
+    except Exception as e:
+        # broken meshes make meshio's parsers fail in many ways (struct.error, KeyError, ...),
+        # so report any error here rather than let one file abort the whole pool
+        return filename, repr(e)
+    return filename, None
 
 def convert_to_ply():
     my_parser = argparse.ArgumentParser(description="Takes all mesh files and creates a new version in .PLY format.")
     my_parser.add_argument('input_dir', metavar='input_directory', type=pathlib.Path, help='the directory containing the mesh files')
     my_parser.add_argument('dest_dir', metavar='output_directory', type=pathlib.Path, help='the directory in which to save the .PLY meshes')
-    input_directory = my_parser.parse_args().input_dir
-    output_directory = my_parser.parse_args().dest_dir
+    args = my_parser.parse_args()
+    input_directory = args.input_dir
+    output_directory = args.dest_dir
 
-    all_files = [file.name for file in os.scandir(input_directory) if file.is_file()]
+    with os.scandir(input_directory) as entries:
+        all_files = [entry.name for entry in entries if entry.is_file()]
 
-    try:
-        os.mkdir(output_directory)
-    except FileExistsError:
-        pass
-
-    for sequence_num, filename in enumerate(all_files):
-        print("Converting mesh #" + str(sequence_num) + " of " + str(len(all_files)))
-        try:
-            mesh = meshio.read(os.path.join(input_directory, filename))
-            output_path = pathlib.Path(filename).stem + ".ply"
-            mesh.write(os.path.join(output_directory, output_path))
-        except:
-            pass
+    output_directory.mkdir(parents=True, exist_ok=True)
+
+    tasks = [(input_directory, output_directory, filename) for filename in all_files]
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        # chunksize amortizes the cost of pickling tasks across the worker processes
+        for sequence_num, (filename, error) in enumerate(executor.map(convert_mesh, tasks, chunksize=8)):
+            if error is None:
+                print("Converted mesh #" + str(sequence_num) + " of " + str(len(all_files)) + ": " + filename)
+            else:
+                print("Could not convert mesh #" + str(sequence_num) + " of " + str(len(all_files)) + ": " + filename + " (" + error + ")")
 
 if __name__ == "__main__":
     convert_to_ply()
@@ -28,125 +28,147 @@
 # remove err files
 # put this python file in the scripts folder
 # run this python file to extract data
+# logs whose row is already in the output files are skipped, pass --force to parse them again
 
+import os
 import re
 import pathlib
 import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
-if len(sys.argv) > 1:
-    WORK_DIR = sys.argv[1]
+FORCE = "--force" in sys.argv[1:]
+ARGS = [arg for arg in sys.argv[1:] if arg != "--force"]
+if len(ARGS) > 0:
+    WORK_DIR = ARGS[0]
 WORK_DIR = pathlib.Path(WORK_DIR)
 
+# fields encoded in the log file names
+EPS_RE = re.compile(r"eps.+(?=alg)")
+DATA_RE = re.compile(r"(?<=data).*")
+ALG_RE = re.compile(r"(?<=alg).+(?=n\d)")
+BATCH_RE = re.compile(r"batchSize.+(?=eps)")
+THREAD_RE = re.compile(r"(?<=t)\d+(?=data)")
+NUMBER_RE = re.compile(r"\d+(?:\.\d+)?(?:e[+-]{0,1}\d+)?")
+LABEL_RE = re.compile(r"(average time|adj list took|Clustering took|Update mesh took|Single region|While loop took|"
+                      r"Update new vertices took|Update representatives took|numIterations|original vertices|vertices after)")
+# maps each label found in a log line to the formatRow argument it fills
+LABEL_TO_FIELD = {
+    "average time": "time_all",
+    "adj list took": "time_p",
+    "Clustering took": "time_c",
+    "Update mesh took": "time_u",
+    "Single region": "time_s",
+    "While loop took": "time_w",
+    "Update new vertices took": "time_unv",
+    "Update representatives took": "time_ur",
+    "numIterations": "num_iterations",
+    "original vertices": "num_original_vertices",
+    "vertices after": "num_simplified_vertices",
+}
+
 def extractNumber(s: str) -> str:
-    return "".join(re.findall(r"(\d+(?:\.\d+)?)(e[+-]{0,1}\d+)?", s)[0])
-
-def extractRow(s: str, pattern: str) -> str:
-    return re.findall(pattern, s)[0]
-
-def write2File(dataset_name: str, eps: str, algorithm_name: str, thread_num: str, time_all: str,
-               time_p:str, time_c: str, time_w: str, time_s: str, 
-               time_unv: str, time_ur: str, time_u: str, batchSize: str, 
-               num_iterations: str, num_original_vertices: str, num_simplified_vertices: str):
-    header = "threadNum,timeAll,timeP,timeC,timeW,timeS,timeUNV,timeUR,timeU,batch,numIter,numOrgVerts,numSimpVerts\n"
-    # create the directory if it doesn't exist
-    pathlib.Path(WORK_DIR / dataset_name).mkdir(parents=True, exist_ok=True)
-    # create the directory if it doesn't exist
-    pathlib.Path(WORK_DIR / dataset_name / algorithm_name).mkdir(parents=True, exist_ok=True)
-    file_path = pathlib.Path(WORK_DIR / dataset_name / algorithm_name / f"eps{eps}.dat")
-    # if file eps<eps>.dat doesn't already exist, make it
-    if not file_path.is_file():
-        file_path.touch()
+    return NUMBER_RE.search(s).group(0)
+
+def extractRow(s: str, pattern: re.Pattern) -> str:
+    return pattern.search(s).group(0)
+
+HEADER = "threadNum,timeAll,timeP,timeC,timeW,timeS,timeUNV,timeUR,timeU,batch,numIter,numOrgVerts,numSimpVerts\n"
+
+def formatRow(thread_num: str, time_all: str,
+              time_p:str, time_c: str, time_w: str, time_s: str, 
+              time_unv: str, time_ur: str, time_u: str, batchSize: str, 
+              num_iterations: str, num_original_vertices: str, num_simplified_vertices: str) -> str:
+    return f"{thread_num},{time_all},{time_p},{time_c},{time_w},{time_s},{time_unv},{time_ur},{time_u},{batchSize},{num_iterations},{num_original_vertices},{num_simplified_vertices}\n"
+
+def runKey(row: str) -> tuple:
+    # (threadNum, batch) identifies a row within one eps<eps>.dat file
+    tokens = row.split(',')
+    return tokens[0], tokens[9]
+
+def writeRows(rows_by_file: dict):
+    # rows_by_file maps (dataset_name, algorithm_name, eps) to the rows of eps<eps>.dat
+    for (dataset_name, algorithm_name, eps), rows in rows_by_file.items():
+        file_path = WORK_DIR / dataset_name / algorithm_name / f"eps{eps}.dat"
+        # create the directory if it doesn't exist
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        # keep the rows written by previous runs, without their header, unless they were parsed again
+        if file_path.is_file():
+            parsed_runs = {runKey(row) for row in rows}
+            with file_path.open("r") as f:
+                rows = [row for row in f.readlines()[1:] if runKey(row) not in parsed_runs] + rows
+        rows.sort(key=lambda x: int(x.split(',', 1)[0]))
         with file_path.open("w") as f:
-            f.write(header)
-        
-    # write the passed content to the file
-    with file_path.open("a") as f:
-        f.write(f"{thread_num},{time_all},{time_p},{time_c},{time_w},{time_s},{time_unv},{time_ur},{time_u},{batchSize},{num_iterations},{num_original_vertices},{num_simplified_vertices}\n")
-
-def sortFileContent(path: pathlib.Path):
-    lines = ""
-    with path.open("r") as f:
-        lines = f.readlines()
-    if len(lines) == 0:
-        return
-    with path.open("w") as f:
-        header = lines[0]
-        f.write(f"{header}")
-        body = lines[1:]
-        body.sort(key=lambda x: int(x.split(',')[0]))
-        for line in body:
-            f.write(f"{line}")
-
-
+            f.write(HEADER)
+            f.writelines(rows)
+
+def finishedRuns() -> set:
+    # (dataset_name, algorithm_name, eps, thread_num, batchSize) of every row already in an eps<eps>.dat file
+    finished = set()
+    for file_path in WORK_DIR.glob("*/*/eps*.dat"):
+        dataset_name = file_path.parent.parent.name
+        algorithm_name = file_path.parent.name
+        eps = file_path.stem[len("eps"):]
+        with file_path.open("r") as f:
+            finished.update((dataset_name, algorithm_name, eps) + runKey(row) for row in f.readlines()[1:])
+    return finished
+
+def parseName(name: str):
+    # returns (dataset_name, algorithm_name, eps, thread_num, batchSize) encoded in a log file name
+    eps = extractNumber(extractRow(name, EPS_RE))
+    dataset_name = extractRow(name, DATA_RE).strip()
+    algorithm_name = extractRow(name, ALG_RE)
+    batchSize = "-1"
+    if (algorithm_name.find("batch") >= 0):
+        batchSize = extractNumber(extractRow(name, BATCH_RE))
+    thread_num = extractRow(name, THREAD_RE)
+    return dataset_name, algorithm_name, eps, thread_num, batchSize
+
+def parseLog(path: str):
+    # returns (dataset_name, algorithm_name, eps, row) for one log, or None if it has no timings
+    file = pathlib.Path(path)
+    name = file.stem
+    dataset_name, algorithm_name, eps, thread_num, batchSize = parseName(name)
+    #print(f"name: {name}, eps: {eps}, dataset_name: {dataset_name}, algorithm_name: {algorithm_name}, thread_num: {thread_num}")
+    fields = {
+        "time_all": "", # avg_time
+        "time_p": "", # population
+        "time_c": "", # clustering
+        "time_s": "-1", # single region
+        "time_w": "-1", # while loop
+        "time_u": "-1", # update mesh
+        "time_ur": "-1", # update representatives
+        "time_unv": "-1", # update new vertices
+        "num_iterations": "-1",
+        "num_original_vertices": "-1",
+        "num_simplified_vertices": "-1",
+    }
+    text = file.read_text(errors="replace")
+    for label in LABEL_RE.finditer(text):
+        # the value is the first number following the label on the same line
+        line_end = text.find("\n", label.end())
+        number = NUMBER_RE.search(text, label.end(), len(text) if line_end < 0 else line_end)
+        if number:
+            fields[LABEL_TO_FIELD[label.group(1)]] = number.group(0)
+    if not fields["time_p"]:
+        return None
+    return dataset_name, algorithm_name, eps, formatRow(thread_num, batchSize=batchSize, **fields)
 
 if __name__ == "__main__":
     if not WORK_DIR.is_dir():
         print("work dir doesn't exist")
-    
-    for file in WORK_DIR.iterdir():
-        if (file.is_file()):
-            eps = dataset_name = algorithm_name = thread_num = time_p = time_c = ""
-            with file.open() as f:
-                name = file.stem
-                eps = extractNumber(extractRow(name, r"eps.+(?=alg)"))
-                dataset_name = extractRow(name, r"(?<=data).*").strip()
-                algorithm_name = extractRow(name, r"(?<=alg).+(?=n\d)")
-                batchSize = "-1"
-                if (algorithm_name.find("batch") >= 0):
-                    batchSize = extractNumber(extractRow(name, r"batchSize.+(?=eps)"))
-                thread_num = extractRow(name, r"(?<=t)\d+(?=data)")
-                #print(f"name: {name}, eps: {eps}, dataset_name: {dataset_name}, algorithm_name: {algorithm_name}, thread_num: {thread_num}")
-                time_all = "" # avg_time
-                time_p = "" # population
-                time_c = "" # clustering
-                time_s = "-1" # single region
-                time_w = "-1" # while loop
-                time_u = "-1" # update mesh
-                time_ur = "-1" # update representatives
-                time_unv = "-1" # update new vertices
-                num_iterations = "-1"
-                num_original_vertices = "-1"
-                num_simplified_vertices = "-1"
-                lines = f.readlines()
-                for line in lines:
-                    if (line.find("average time") > -1):
-                        time_all = extractNumber(line)
-                    if (line.find("adj list took") > -1): 
-                        time_p = extractNumber(line)
-                    elif (line.find("Clustering took") > -1): 
-                        time_c = extractNumber(line)
-                    elif (line.find("Update mesh took") > -1):
-                        time_u = extractNumber(line)
-                    elif (line.find("Single region") > -1):
-                        time_s = extractNumber(line)
-                    elif (line.find("While loop took") > -1):
-                        time_w = extractNumber(line)
-                    elif (line.find("Update new vertices took") > -1):
-                        time_unv = extractNumber(line)
-                    elif (line.find("Update representatives took") > -1):
-                        time_ur = extractNumber(line)
-                    elif (line.find("numIterations") > -1):
-                        num_iterations = extractNumber(line)
-                    elif (line.find("original vertices") > -1):
-                        num_original_vertices = extractNumber(line)
-                    elif (line.find("vertices after") > -1):
-                        num_simplified_vertices = extractNumber(line)
-                    else: pass
-            # everything is extracted, write them to file
-            if (time_p):  write2File(dataset_name, eps, algorithm_name, thread_num, time_all,
-                                     time_p, time_c, time_w, time_s, time_unv, time_ur, time_u, batchSize,
-                                     num_iterations, num_original_vertices, num_simplified_vertices)
-
-    for dataset_path in WORK_DIR.iterdir():
-        if dataset_path.is_dir():
-            for algorithm_path in dataset_path.iterdir():
-                if algorithm_path.is_dir():
-                    for file in algorithm_path.iterdir():
-                        if file.is_file():
-                            sortFileContent(file)
-
-
-
-
-    
 
+    rows_by_file = defaultdict(list)
+    with os.scandir(WORK_DIR) as entries:
+        files = [entry.path for entry in entries if entry.is_file()]
+    if not FORCE:
+        finished = finishedRuns()
+        files = [path for path in files if parseName(pathlib.Path(path).stem) not in finished]
+    # each log is parsed independently, so spread them over all cores
+    with ProcessPoolExecutor() as executor:
+        for parsed in executor.map(parseLog, files, chunksize=32):
+            if parsed:
+                dataset_name, algorithm_name, eps, row = parsed
+                rows_by_file[(dataset_name, algorithm_name, eps)].append(row)
+
+    writeRows(rows_by_file)
@@ -27,54 +27,51 @@
 import re
 import pathlib
 import sys
+from typing import Optional
+import pandas as pd
 
 if len(sys.argv) > 1:
     WORK_DIR = sys.argv[1]
 WORK_DIR = pathlib.Path(WORK_DIR)
 CSV_DIR = WORK_DIR / "csv"
+EPS_RE = re.compile(r"[-+]?(?:\d*\.*\d+)")
 
-def writeToCsv(csv_file, path: pathlib.Path, dataset_name: str, algorithm_name: str, eps: str):
+# .dat columns in the order they appear in all_data.csv, and the names they get there
+COLUMNS = ["Algorithm", "Dataset", "threadNum", "Eps", "batch", "timeAll", "timeP", "timeC", "timeW", "timeS",
+           "timeUNV", "timeUR", "timeU", "numIter", "numOrgVerts", "numSimpVerts"]
+CSV_COLUMNS = ["Algorithm", "Dataset", "Core", "Eps", "Batch", "timeAll", "timeP", "timeC", "timeW", "timeS",
+               "timeUNV", "timeUR", "timeU", "numIter", "numOrgVerts", "numSimpVerts"]
+
+def loadDat(path: pathlib.Path, dataset_name: str, algorithm_name: str, eps: str) -> Optional[pd.DataFrame]:
     print(f"input params: dataset: {dataset_name}, alg: {algorithm_name}, eps: {eps}")
-    lines = ""
-    with path.open("r") as f:
-        lines = f.readlines()
-    
-    if len(lines) == 0:
-        return
-    header = lines[0]
-    body = lines[1:]
+    # read every value as text so numbers are copied through exactly as extract.py wrote them
+    try:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    except pd.errors.EmptyDataError:
+        return None
 
-    for line in body:
-        tokens = line.split(",")
-        cores = tokens[0]
-        timeAll = tokens[1]
-        timeP = tokens[2]
-        timeC = tokens[3]
-        timeW = tokens[4]
-        timeS = tokens[5]
-        timeUNV = tokens[6]
-        timeUR = tokens[7]
-        timeU = tokens[8]
-        batch = tokens[9]
-        num_iterations = tokens[10]
-        num_original_vertices = tokens[11]
-        num_simplified_vertices = tokens[12].strip()
-        csv_file.write(f"{algorithm_name},{dataset_name},{cores},{eps},{batch},{timeAll},{timeP},{timeC},{timeW},{timeS},{timeUNV},{timeUR},{timeU},{num_iterations},{num_original_vertices},{num_simplified_vertices}\n")
+    df.insert(0, "Algorithm", algorithm_name)
+    df.insert(1, "Dataset", dataset_name)
+    df.insert(3, "Eps", eps)
+    df = df[COLUMNS]
+    df.columns = CSV_COLUMNS
+    return df
 
 if __name__ == "__main__":
     # create the directory for plots if doesn't exist
     CSV_DIR.mkdir(parents=True, exist_ok=True)
-    with open(str(CSV_DIR / "all_data.csv"), "w") as csv_file:
-        csv_file.write("Algorithm,Dataset,Core,Eps,Batch,timeAll,timeP,timeC,timeW,timeS,timeUNV,timeUR,timeU,numIter,numOrgVerts,numSimpVerts\n")
-    
-    with open(str(CSV_DIR / "all_data.csv"), "a") as csv_file:
-        for dataset_path in WORK_DIR.iterdir():
-            if dataset_path.is_dir():
-                dataset_name = dataset_path.name
-                for algorithm_path in dataset_path.iterdir():
-                    if algorithm_path.is_dir():
-                        algorithm_name = algorithm_path.name
-                        for file in algorithm_path.iterdir():
-                            if file.is_file():
-                                eps = re.findall(r"[-+]?(?:\d*\.*\d+)", file.stem)[0]
-                                writeToCsv(csv_file, file, dataset_name, algorithm_name, eps)
\ No newline at end of file
+    frames = []
+    for file in WORK_DIR.rglob("eps*.dat"):
+        # only pick up <dataset>/<algorithm>/eps<eps>.dat, never anything under csv/
+        if file.parent.parent.parent != WORK_DIR or file.parent.parent == CSV_DIR:
+            continue
+        dataset_name = file.parent.parent.name
+        algorithm_name = file.parent.name
+        eps = EPS_RE.findall(file.stem)[0]
+        df = loadDat(file, dataset_name, algorithm_name, eps)
+        if df is not None:
+            frames.append(df)
+
+    # the .dat files are small, so build the whole table in memory and write it at once
+    all_data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=CSV_COLUMNS)
+    all_data.to_csv(CSV_DIR / "all_data.csv", index=False, lineterminator="\n")